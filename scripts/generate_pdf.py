@@ -11,11 +11,18 @@ import argparse
 import os
 import re
 import sys
+from itertools import chain, islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator
 
 try:
     from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
+    from PIL import Image, UnidentifiedImageError  # fpdf2 の依存パッケージ
 except ImportError:
     print("fpdf2が必要です: pip install fpdf2", file=sys.stderr)
     sys.exit(1)
@@ -36,22 +43,52 @@ EMOJI_MAP = {
     "🎯": "[TARGET]",
 }
 
-# 追加: よくある絵文字パターンを除去
-EMOJI_PATTERN = re.compile(
-    "["
-    "\U0001f600-\U0001f64f"  # emoticons
-    "\U0001f300-\U0001f5ff"  # symbols & pictographs
-    "\U0001f680-\U0001f6ff"  # transport & map
-    "\U0001f1e0-\U0001f1ff"  # flags
-    "\U00002702-\U000027b0"
-    "\U0000fe0f"             # variation selector
-    "]+",
+# 追加: よくある絵文字パターンを除去（コードポイント範囲、両端を含む）
+_EMOJI_RANGES = [
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map
+    (0x1F1E0, 0x1F1FF),  # flags
+    (0x2702, 0x27B0),
+    (0xFE0F, 0xFE0F),    # variation selector
+]
+_EMOJI_CLASS = "[" + "".join(f"{chr(lo)}-{chr(hi)}" for lo, hi in _EMOJI_RANGES) + "]"
+
+# 置換・除去対象の絵文字を含むかどうかの判定用
+_EMOJI_RE = re.compile(
+    "|".join(map(re.escape, sorted(EMOJI_MAP, key=len, reverse=True))) + "|" + _EMOJI_CLASS,
     flags=re.UNICODE,
 )
 
+# 複数コードポイントからなるマップ対象（"⚠️" など）は先に正規表現で置換
+_EMOJI_SEQ_RE = re.compile(
+    "|".join(map(re.escape, sorted((e for e in EMOJI_MAP if len(e) > 1), key=len, reverse=True))),
+    flags=re.UNICODE,
+)
+
+# 1文字のマップ対象の置換と、残りの絵文字の除去は str.translate で一括処理
+_EMOJI_TRANS = dict.fromkeys(
+    chain.from_iterable(range(lo, hi + 1) for lo, hi in _EMOJI_RANGES),
+    None,
+)
+_EMOJI_TRANS.update({ord(e): r for e, r in EMOJI_MAP.items() if len(e) == 1})
+
+
+# Markdown パース用の正規表現
+_IMG_RE = re.compile(r"!\[([^\]]*)\]\(([^)]+)\)")  # 画像参照: ![alt](path)
+_SEP_RE = re.compile(r"^[-:]+$")                 # テーブルのセパレータセル
+
+# これ以下のサイズの画像はJPEG変換しない（変換の効果が小さいため）
+JPEG_MIN_BYTES = 200 * 1024
 
+# スクショ一覧の並列読込ワーカー数の上限（先読み枚数はこの2倍まで）
+MAX_IMAGE_WORKERS = 8
+
+
+@lru_cache(maxsize=None)
 def find_font(font_arg: str, images_dir: str = "") -> Optional[str]:
-    """日本語フォントを検索"""
+    """日本語フォントを検索（結果はプロセス内でキャッシュ）"""
+    # 明示指定されたフォントは信頼し、ヘッダ検証は自動検索の候補にのみ行う
     if font_arg != "auto" and os.path.exists(font_arg):
         return font_arg
 
@@ -59,13 +96,13 @@ def find_font(font_arg: str, images_dir: str = "") -> Optional[str]:
 
     # プロジェクト内のNotoSansJPを探す
     if images_dir:
-        project_root = Path(images_dir)
-        for _ in range(5):
+        images_path = Path(images_dir).resolve()
+        # images_dir 自身と最大4階層上までの祖先
+        for project_root in islice(chain([images_path], images_path.parents), 5):
             noto = project_root / "public" / "fonts" / "NotoSansJP-Regular.ttf"
             if noto.exists():
                 candidates.append(str(noto))
                 break
-            project_root = project_root.parent
 
     candidates.extend([
         # macOS
@@ -77,66 +114,99 @@ def find_font(font_arg: str, images_dir: str = "") -> Optional[str]:
         "/usr/share/fonts/truetype/noto/NotoSansJP-Regular.ttf",
     ])
 
+    # TrueType/OpenType/TTC の先頭バイト
+    valid_headers = (b"\x00\x01\x00\x00", b"OTTO", b"ttcf", b"true", b"wOFF")
     for f in candidates:
-        if os.path.exists(f):
-            # 簡易バリデーション: ファイルサイズが小さすぎるorテキストファイルはスキップ
+        # 簡易バリデーション: ファイルサイズが小さすぎるorテキストファイルはスキップ
+        # （存在確認とサイズ取得を os.stat 1回で兼ねる）
+        try:
+            if os.stat(f).st_size < 10000:
+                continue
+            # Windows ではテキストモードにならないよう O_BINARY を付ける
+            fd = os.open(f, os.O_RDONLY | getattr(os, "O_BINARY", 0))
             try:
-                size = os.path.getsize(f)
-                if size < 10000:
-                    continue
-                with open(f, "rb") as fh:
-                    header = fh.read(4)
-                # TrueType/OpenType/TTC の先頭バイトチェック
-                valid_headers = [b"\x00\x01\x00\x00", b"OTTO", b"ttcf", b"true", b"wOFF"]
-                if not any(header.startswith(h) for h in valid_headers):
-                    continue
-            except Exception:
+                header = os.read(fd, 4)
+            finally:
+                os.close(fd)
+            if not header.startswith(valid_headers):
                 continue
-            return f
+        except Exception:
+            continue
+        return f
     return None
 
 
 def replace_emoji(text: str) -> str:
-    """絵文字をテキスト表記に置換"""
-    for emoji, replacement in EMOJI_MAP.items():
-        text = text.replace(emoji, replacement)
-    # 残りの絵文字を除去
-    text = EMOJI_PATTERN.sub("", text)
-    return text
+    """絵文字をテキスト表記に置換（マップにない絵文字は除去）"""
+    text = _EMOJI_SEQ_RE.sub(lambda m: EMOJI_MAP[m.group()], text)
+    return text.translate(_EMOJI_TRANS)
+
+
+@lru_cache(maxsize=4096)
+def _replace_emoji_cached(text: str) -> str:
+    """replace_emoji のキャッシュ版（表セル・箇条書きなど繰り返し出現する文字列向け）"""
+    return replace_emoji(text)
+
+
+def _parse_text(stripped: str) -> Dict:
+    return {"type": "text", "text": stripped}
+
+
+def _parse_heading(stripped: str) -> Dict:
+    # "# " / "## " / "### " のみ見出しとして扱う
+    if stripped.startswith("# "):
+        return {"type": "h1", "text": stripped[2:]}
+    if stripped.startswith("## "):
+        return {"type": "h2", "text": stripped[3:]}
+    if stripped.startswith("### "):
+        return {"type": "h3", "text": stripped[4:]}
+    return _parse_text(stripped)
+
+
+def _parse_image_or_text(stripped: str) -> Dict:
+    m = _IMG_RE.match(stripped)
+    if m:
+        return {"type": "image", "alt": m.group(1), "path": m.group(2)}
+    return _parse_text(stripped)
+
+
+def _parse_table(stripped: str) -> Dict:
+    if "|" in stripped[1:]:
+        return {"type": "table_row", "text": stripped}
+    return _parse_text(stripped)
+
+
+def _parse_bullet_or_hr(stripped: str) -> Dict:
+    if stripped.startswith("- "):
+        return {"type": "bullet", "text": stripped[2:]}
+    if stripped.startswith("---"):
+        return {"type": "hr"}
+    return _parse_text(stripped)
+
+
+# 行頭1文字 → パース関数（該当しない行はテキスト）
+_DISPATCH = {
+    "#": _parse_heading,
+    "!": _parse_image_or_text,
+    "|": _parse_table,
+    "-": _parse_bullet_or_hr,
+}
 
 
-def parse_markdown(md_text: str) -> List[Dict]:
-    """Markdownをパースしてセクションのリストに変換"""
-    lines = md_text.split("\n")
-    sections = []
+def read_lines(path: str) -> Iterator[str]:
+    """ファイルを1行ずつ読み込む（全文をメモリに載せない）"""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from f
 
+
+def parse_markdown(lines: Iterable[str]) -> Iterator[Dict]:
+    """Markdownの行を順にパースしてセクションを返す"""
     for line in lines:
         stripped = line.strip()
         if not stripped:
-            sections.append({"type": "blank"})
-        elif stripped.startswith("# "):
-            sections.append({"type": "h1", "text": stripped[2:]})
-        elif stripped.startswith("## "):
-            sections.append({"type": "h2", "text": stripped[3:]})
-        elif stripped.startswith("### "):
-            sections.append({"type": "h3", "text": stripped[4:]})
-        elif stripped.startswith("!["):
-            # 画像参照: ![alt](path)
-            m = re.match(r"!\[([^\]]*)\]\(([^)]+)\)", stripped)
-            if m:
-                sections.append({"type": "image", "alt": m.group(1), "path": m.group(2)})
-            else:
-                sections.append({"type": "text", "text": stripped})
-        elif stripped.startswith("|") and "|" in stripped[1:]:
-            sections.append({"type": "table_row", "text": stripped})
-        elif stripped.startswith("- "):
-            sections.append({"type": "bullet", "text": stripped[2:]})
-        elif stripped.startswith("---"):
-            sections.append({"type": "hr"})
+            yield {"type": "blank"}
         else:
-            sections.append({"type": "text", "text": stripped})
-
-    return sections
+            yield _DISPATCH.get(stripped[0], _parse_text)(stripped)
 
 
 def collect_images(images_dir: str) -> List[str]:
@@ -144,19 +214,30 @@ def collect_images(images_dir: str) -> List[str]:
     if not images_dir or not os.path.isdir(images_dir):
         return []
     exts = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-    files = [
-        f for f in sorted(os.listdir(images_dir))
-        if Path(f).suffix.lower() in exts
-    ]
+    with os.scandir(images_dir) as it:
+        files = [
+            e.name for e in it
+            if os.path.splitext(e.name)[1].lower() in exts and e.is_file()
+        ]
+    files.sort()
     return files
 
 
 class ReportPDF(FPDF):
     """報告書PDF"""
 
-    def __init__(self, font_path: Optional[str] = None):
+    def __init__(self, font_path: Optional[str] = None, max_dpi: int = 0, jpeg_quality: int = 0):
         super().__init__()
         self.font_path = font_path
+        # 埋め込み画像の最大解像度（0 なら縮小しない）
+        self.max_dpi = max_dpi
+        # 不透明画像をJPEG変換する際の品質（0 なら変換しない）
+        self.jpeg_quality = jpeg_quality
+        # 絵文字が出てくるまでは置換処理をスキップ（note_lines / note_text で有効化）
+        self._has_emoji = False
+        # テーブル描画状態: 直前の行の列数と列幅（列数 0 はテーブル外）
+        self._table_cols = 0
+        self._table_col_w = 0.0
         self._setup_font()
 
     def _setup_font(self):
@@ -170,9 +251,31 @@ class ReportPDF(FPDF):
     def _set_font(self, style: str = "", size: int = 10):
         if self._jp:
             # .ttc では Bold スタイルが使えないため常に Regular
-            self.set_font("JP", "", size)
+            family, style = "jp", ""
         else:
-            self.set_font("Helvetica", style, size)
+            family = "helvetica"
+        # 選択中のフォントと同じなら何もしない
+        # （改ページ時に fpdf2 がフォントを復元するため、独自キャッシュではなく fpdf2 の状態と比較）
+        if self.font_family == family and self.font_style == style and self.font_size_pt == size:
+            return
+        self.set_font(family, style, size)
+
+    def note_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """行をそのまま返しつつ、絵文字を含む行が来た時点で置換処理を有効化"""
+        for line in lines:
+            if not self._has_emoji and _EMOJI_RE.search(line):
+                self._has_emoji = True
+            yield line
+
+    def note_text(self, texts: Iterable[str]):
+        """Markdown 以外から出力する文字列（ファイル名など）を絵文字判定に含める"""
+        if not self._has_emoji:
+            self._has_emoji = any(_EMOJI_RE.search(t) for t in texts)
+
+    def _clean(self, text: str) -> str:
+        if not self._has_emoji:
+            return text
+        return _replace_emoji_cached(text)
 
     def header(self):
         pass
@@ -187,7 +290,7 @@ class ReportPDF(FPDF):
     def add_h1(self, text: str):
         self._set_font("B", 18)
         self.set_text_color(30, 30, 30)
-        self.cell(0, 14, replace_emoji(text), new_x="LMARGIN", new_y="NEXT")
+        self.cell(0, 14, self._clean(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         # 下線
         self.set_draw_color(50, 50, 50)
         self.set_line_width(0.5)
@@ -200,41 +303,58 @@ class ReportPDF(FPDF):
         self.ln(3)
         self._set_font("B", 14)
         self.set_text_color(40, 40, 40)
-        self.cell(0, 10, replace_emoji(text), new_x="LMARGIN", new_y="NEXT")
+        self.cell(0, 10, self._clean(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.set_text_color(0, 0, 0)
 
     def add_h3(self, text: str):
         self.ln(2)
         self._set_font("B", 12)
         self.set_text_color(50, 50, 50)
-        self.cell(0, 8, replace_emoji(text), new_x="LMARGIN", new_y="NEXT")
+        self.cell(0, 8, self._clean(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.set_text_color(0, 0, 0)
 
     def add_text(self, text: str):
         self._set_font("", 10)
-        self.multi_cell(0, 6, replace_emoji(text), new_x="LMARGIN", new_y="NEXT")
+        self.multi_cell(0, 6, self._clean(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     def add_bullet(self, text: str):
+        self.add_bullets([text])
+
+    def add_bullets(self, texts: List[str]):
+        """連続する箇条書きを1回の multi_cell でまとめて描画"""
         self._set_font("", 10)
-        self.cell(6, 6, "・")
-        self.multi_cell(0, 6, replace_emoji(text), new_x="LMARGIN", new_y="NEXT")
+        body = "\n".join(f"・ {self._clean(t)}" for t in texts)
+        self.multi_cell(0, 6, body, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def end_table(self):
+        """テーブルの終わり（次のテーブルでは列幅を再計算する）"""
+        self._table_cols = 0
 
     def add_table_row(self, text: str, is_header: bool = False):
         """簡易テーブル行の描画"""
-        cells = [c.strip() for c in text.strip("|").split("|")]
+        # 絵文字処理は行単位で1回だけ行い、その後セルに分割
+        cells = [c.strip() for c in self._clean(text).strip("|").split("|")]
         # セパレータ行はスキップ
-        if all(re.match(r"^[-:]+$", c) for c in cells):
+        if all(_SEP_RE.match(c) for c in cells):
             return
 
         self._set_font("B" if is_header else "", 9)
-        col_w = (self.w - self.l_margin - self.r_margin) / max(len(cells), 1)
+        # 列幅は列数が変わったときのみ再計算
+        if self._table_cols != len(cells):
+            self._table_cols = len(cells)
+            self._table_col_w = (self.w - self.l_margin - self.r_margin) / max(len(cells), 1)
+
         for cell in cells:
-            self.cell(col_w, 6, replace_emoji(cell)[:40], border=1)
+            self.cell(self._table_col_w, 6, cell[:40], border=1)
         self.ln()
 
-    def add_image_embed(self, img_path: str, alt: str = ""):
-        """画像をPDFに埋め込み（ページ幅に合わせる）"""
-        if not os.path.exists(img_path):
+    def add_image_embed(self, img_path: str, alt: str = "", image=None):
+        """画像をPDFに埋め込み（ページ幅に合わせる）
+
+        image に prepare_image() の結果を渡すと、ファイルを再度読み込まずに埋め込む。
+        渡された画像は埋め込み後に close される。
+        """
+        if image is None and not os.path.exists(img_path):
             self.add_text(f"[画像なし: {alt or img_path}]")
             return
 
@@ -244,10 +364,114 @@ class ReportPDF(FPDF):
             self.add_page()
 
         try:
-            self.image(img_path, x=self.l_margin, w=avail_w)
+            if image is None:
+                image = self.prepare_image(img_path)
+            if isinstance(image, Image.Image) and self._needs_tiling(image, avail_w):
+                self._embed_tiles(image, img_path, avail_w)
+            else:
+                self.image(image, x=self.l_margin, w=avail_w)
             self.ln(4)
+        except UnidentifiedImageError:
+            # 例外メッセージには BytesIO の repr が入るため固定文言にする
+            self.add_text(f"[画像読込エラー: {img_path}: 未対応の画像形式です]")
         except Exception as e:
-            self.add_text(f"[画像読込エラー: {e}]")
+            self.add_text(f"[画像読込エラー: {img_path}: {type(e).__name__}: {e}]")
+        finally:
+            # fpdf2 は圧縮済みデータを保持するので、画像バッファはすぐ解放する
+            # （スクショ一覧では先読み中の画像も残るため、メモリ上限は先読み枚数で決まる）
+            if image is not None:
+                image.close()
+
+    def prepare_image(self, img_path: str):
+        """埋め込み前の画像処理（縮小・JPEG変換）を行い、fpdf2 に渡す画像を返す
+
+        ファイルは1回だけ読み込み、加工が不要（SVG・Pillow 非対応形式を含む）なら
+        そのバイト列を BytesIO で返す
+        （fpdf2 はファイルを開き直さず、内容ハッシュで重複画像を1つにまとめる）。
+        1ページに収まらない縦長の画像はデコード済みの PIL.Image で返し、
+        分割は描画位置が決まる add_image_embed で行う。
+        PDF の状態を変更しないため、複数スレッドから並行して呼び出せる。
+        """
+        with open(img_path, "rb") as f:
+            data = f.read()
+        # SVG は fpdf2 がベクター画像として扱うため、加工せずそのまま渡す
+        if img_path.lower().endswith(".svg"):
+            return BytesIO(data)
+
+        # この時点ではヘッダのみ読み込まれ、デコードは必要になるまで行われない
+        # （Pillow が扱えない形式は、判定とエラー表示を fpdf2 に任せる）
+        try:
+            image = Image.open(BytesIO(data))
+        except Exception:
+            return BytesIO(data)
+        orig_size = image.size
+        avail_w = self.w - self.l_margin - self.r_margin
+        if self.max_dpi > 0:
+            image = self._downscale(image, avail_w)
+
+        if self._needs_tiling(image, avail_w):
+            image.load()
+            return image
+        if self._should_jpeg(image, len(data)):
+            return self._to_jpeg(image)
+        if image.size == orig_size:
+            image.close()
+            return BytesIO(data)
+        return image
+
+    def _should_jpeg(self, image: "Image.Image", file_size: int) -> bool:
+        # 透過のない大きな画像のみJPEGで再圧縮
+        # （RGB/L でも tRNS のカラーキーを持つ PNG は透過するため対象外。
+        #   元から JPEG の画像は再圧縮しても大きく・粗くなるだけなので対象外。
+        #   切り出したタイルは format を持たないため、元のデコード済み画像を渡すこと）
+        return (
+            self.jpeg_quality > 0
+            and file_size > JPEG_MIN_BYTES
+            and image.format != "JPEG"
+            and image.mode in ("RGB", "L")
+            and "transparency" not in image.info
+        )
+
+    def _needs_tiling(self, image: "Image.Image", width_mm: float) -> bool:
+        """幅 width_mm で表示したときに1ページの高さを超えるか"""
+        page_h = self.h - self.t_margin - self.b_margin
+        return image.height * width_mm / image.width > page_h
+
+    def _embed_tiles(self, image: "Image.Image", img_path: str, width_mm: float):
+        """縦長の画像を縦方向に分割し、1枚目は現在位置から、以降は1ページに1枚ずつ配置"""
+        convert = self._should_jpeg(image, os.path.getsize(img_path))
+        px_per_mm = image.width / width_mm
+        avail_h = self.h - self.b_margin - self.get_y()
+        top = 0
+        while top < image.height:
+            if top > 0:
+                self.add_page()
+                avail_h = self.h - self.t_margin - self.b_margin
+            bottom = min(top + max(1, int(avail_h * px_per_mm)), image.height)
+            tile = image.crop((0, top, image.width, bottom))
+            if convert:
+                tile = self._to_jpeg(tile)
+            try:
+                self.image(tile, x=self.l_margin, w=width_mm)
+            finally:
+                tile.close()
+            top = bottom
+
+    def _to_jpeg(self, image: "Image.Image") -> BytesIO:
+        buf = BytesIO()
+        image.save(buf, "JPEG", quality=self.jpeg_quality, optimize=True)
+        image.close()
+        buf.seek(0)
+        return buf
+
+    def _downscale(self, image: "Image.Image", width_mm: float) -> "Image.Image":
+        """表示幅に対して max_dpi を超える解像度の画像を縮小"""
+        target_w = int(width_mm / 25.4 * self.max_dpi)
+        if image.width <= target_w:
+            return image
+        target_h = max(1, round(image.height * target_w / image.width))
+        image.thumbnail((target_w, target_h), Image.LANCZOS)
+        return image
 
     def add_hr(self):
         self.ln(3)
@@ -258,7 +482,23 @@ class ReportPDF(FPDF):
         self.ln(3)
 
 
-def generate_pdf(report_path: str, images_dir: str, output_path: str, font_arg: str):
+def _preprocess_image(pdf: ReportPDF, img_path: str):
+    """スクショ一覧用に画像を読込・加工（ワーカースレッドで実行）"""
+    # 失敗した場合は None を返し、エラー表示は add_image_embed に任せる
+    try:
+        return pdf.prepare_image(img_path)
+    except Exception:
+        return None
+
+
+def _submit_image(executor: ThreadPoolExecutor, pdf: ReportPDF, images_dir: str, img_file: str):
+    """スクショ1枚の読込・加工をワーカーに投入し、(ファイル名, パス, Future) を返す"""
+    img_full = os.path.join(images_dir, img_file)
+    return img_file, img_full, executor.submit(_preprocess_image, pdf, img_full)
+
+
+def generate_pdf(report_path: str, images_dir: str, output_path: str, font_arg: str,
+                 max_dpi: int = 0, jpeg_quality: int = 0):
     """メイン: report.mdを読み込みPDFを生成"""
 
     # フォント検索
@@ -268,28 +508,36 @@ def generate_pdf(report_path: str, images_dir: str, output_path: str, font_arg:
     else:
         print("WARNING: 日本語フォント未検出", file=sys.stderr)
 
-    # Markdown読み込み
-    with open(report_path, "r", encoding="utf-8") as f:
-        md_text = f.read()
-
-    sections = parse_markdown(md_text)
-
     # PDF作成
-    pdf = ReportPDF(font_path)
+    pdf = ReportPDF(font_path, max_dpi=max_dpi, jpeg_quality=jpeg_quality)
     pdf.alias_nb_pages()
     pdf.set_margins(15, 15, 15)
     pdf.set_auto_page_break(auto=True, margin=20)
     pdf.add_page()
 
+    # Markdownは1回だけ行単位で逐次読み込み・パース
+    # （絵文字の有無は読み込みながら判定する。判定はオフ→オンにしか変わらず、
+    #   最初の絵文字より前の行には絵文字がないため結果は変わらない）
+    sections = parse_markdown(pdf.note_lines(read_lines(report_path)))
+
     table_started = False
-    table_row_idx = 0
+    md_has_images = False
+    bullets: List[str] = []
 
     for sec in sections:
         t = sec["type"]
 
         if t != "table_row":
             table_started = False
-            table_row_idx = 0
+            pdf.end_table()
+
+        # 連続する箇条書きはまとめて描画
+        if t == "bullet":
+            bullets.append(sec["text"])
+            continue
+        if bullets:
+            pdf.add_bullets(bullets)
+            bullets = []
 
         if t == "h1":
             pdf.add_h1(sec["text"])
@@ -299,14 +547,12 @@ def generate_pdf(report_path: str, images_dir: str, output_path: str, font_arg:
             pdf.add_h3(sec["text"])
         elif t == "text":
             pdf.add_text(sec["text"])
-        elif t == "bullet":
-            pdf.add_bullet(sec["text"])
         elif t == "table_row":
             is_header = not table_started
             table_started = True
-            table_row_idx += 1
             pdf.add_table_row(sec["text"], is_header=is_header)
         elif t == "image":
+            md_has_images = True
             # 画像パス解決
             img_path = sec["path"]
             if not os.path.isabs(img_path):
@@ -323,38 +569,78 @@ def generate_pdf(report_path: str, images_dir: str, output_path: str, font_arg:
             pdf.add_hr()
         elif t == "blank":
             pdf.ln(2)
+    if bullets:
+        pdf.add_bullets(bullets)
 
     # images_dirに画像があり、mdに画像参照がない場合、末尾に全スクショを追加
-    md_has_images = any(s["type"] == "image" for s in sections)
     if not md_has_images and images_dir:
         imgs = collect_images(images_dir)
         if imgs:
+            # ファイル名も本文として出力するため絵文字判定に含める
+            pdf.note_text(imgs)
             pdf.add_page()
             pdf.add_h2("スクリーンショット一覧")
-            for img_file in imgs:
-                img_full = os.path.join(images_dir, img_file)
-                pdf.add_text(img_file)
-                pdf.add_image_embed(img_full, img_file)
-                pdf.ln(2)
+            # デコード・縮小は並列に行い、PDFへの書き込みはメインスレッドで順番に行う
+            # （先読みは最大 2 * ワーカー数 枚までとし、デコード済み画像が溜まらないようにする）
+            workers = min(os.cpu_count() or 1, MAX_IMAGE_WORKERS)
+            queued = iter(imgs)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = deque(
+                    _submit_image(executor, pdf, images_dir, f) for f in islice(queued, 2 * workers)
+                )
+                while pending:
+                    img_file, img_full, future = pending.popleft()
+                    next_file = next(queued, None)
+                    if next_file is not None:
+                        pending.append(_submit_image(executor, pdf, images_dir, next_file))
+                    pdf.add_text(img_file)
+                    pdf.add_image_embed(img_full, img_file, image=future.result())
+                    pdf.ln(2)
 
     pdf.output(output_path)
     print(f"PDF生成完了: {output_path}")
     print(f"  ページ数: {pdf.page_no()}")
 
 
+def _max_dpi(value: str) -> int:
+    """--max-dpi の値を検証（0 以上）"""
+    try:
+        dpi = int(value)
+    except ValueError:
+        dpi = -1
+    if dpi < 0:
+        raise argparse.ArgumentTypeError(f"0 以上の整数を指定してください: {value}")
+    return dpi
+
+
+def _jpeg_quality(value: str) -> int:
+    """--jpeg-quality の値を検証（0 または 1〜95）"""
+    try:
+        quality = int(value)
+    except ValueError:
+        quality = -1
+    if quality != 0 and not 1 <= quality <= 95:
+        raise argparse.ArgumentTypeError(f"0 または 1〜95 を指定してください: {value}")
+    return quality
+
+
 def main():
     parser = argparse.ArgumentParser(description="Markdown報告書→PDF変換")
     parser.add_argument("--report", required=True, help="report.md のパス")
     parser.add_argument("--images", default="", help="スクショディレクトリ")
     parser.add_argument("--output", required=True, help="出力PDFパス")
     parser.add_argument("--font", default="auto", help="フォントパス or 'auto'")
+    parser.add_argument("--max-dpi", type=_max_dpi, default=0,
+                        help="埋め込み画像の最大解像度（例: 150）。0 で縮小しない")
+    parser.add_argument("--jpeg-quality", type=_jpeg_quality, default=0,
+                        help="透過のない大きな画像をJPEG変換する際の品質（例: 80）。0 で変換しない")
     args = parser.parse_args()
 
     if not os.path.exists(args.report):
         print(f"ERROR: {args.report} が見つかりません", file=sys.stderr)
         sys.exit(1)
 
-    generate_pdf(args.report, args.images, args.output, args.font)
+    generate_pdf(args.report, args.images, args.output, args.font, args.max_dpi, args.jpeg_quality)
 
 
 if __name__ == "__main__":